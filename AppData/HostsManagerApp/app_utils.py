@@ -7,20 +7,31 @@ root_folder : str
     The main folder containing the application. All commands must be executed from this location
     without exceptions.
 """
+import heapq
+import json
 import os
 import re
 import time
 
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from datetime import datetime
 from datetime import timedelta
 from ipaddress import ip_address
+from itertools import islice
 from shutil import copy2
+from shutil import copyfileobj
 from shutil import rmtree
+from socket import getdefaulttimeout
 from socket import gethostname
+from socket import setdefaulttimeout
 from subprocess import CalledProcessError
 from subprocess import STDOUT
 from tempfile import NamedTemporaryFile
+from tempfile import TemporaryFile
+from threading import Event
+from urllib.parse import urlparse
 
 from .python_utils import cmd_utils
 from .python_utils import exceptions
@@ -37,24 +48,77 @@ from .schemas import sources_schema
 
 from .pre_processors import pre_processors as builtin_pre_processors
 
+try:
+    import requests
 
-root_folder = os.path.realpath(os.path.abspath(os.path.join(
-    os.path.normpath(os.getcwd()))))
+    from requests.adapters import HTTPAdapter
+    from urllib3 import disable_warnings
+    from urllib3.exceptions import InsecureRequestWarning
+    from urllib3.util.retry import Retry
+    REQUESTS_INSTALLED = True
+except ImportError:
+    REQUESTS_INSTALLED = False
 
-_hostname_regex = re.compile(r"(?!-)[\w-]{1,63}(?<!-)$")
+# NOTE: os.getcwd always returns an absolute path and os.path.realpath normalizes it.
+root_folder = os.path.realpath(os.getcwd())
+
+# All labels of a host name are validated by a single match.
+_hostname_regex = re.compile(r"(?!-)[\w-]{1,63}(?<!-)(?:\.(?!-)[\w-]{1,63}(?<!-))*")
 _invalid_ip_msg = "Invalid IP address."
 _invalid_integer_msg = "Invalid integer."
 _profiles_path = os.path.join(root_folder, "UserData", "profiles")
 _user_data_path = os.path.join(root_folder, "UserData")
 _invalid_rule = None, None, None
-_tar_allowed_args = {
+_read_chunk_size = 128 * 1024
+_max_download_workers = 8
+_io_buffer_size = 1024 * 1024
+_weekly_update_delta = timedelta(days=6)
+_monthly_update_delta = timedelta(days=29)
+_semestrial_update_delta = timedelta(days=87)
+_sort_run_size = 250000
+_progress_bar_min_items = 20
+_ignored_lines_prefixes = ("#", "::1")
+# Host names that are part of the static hosts and should never be blocked.
+_default_hosts = frozenset((
+    "0.0.0.0",
+    "broadcasthost",
+    "ip6-allhosts",
+    "ip6-allnodes",
+    "ip6-allrouters",
+    "ip6-localhost",
+    "ip6-localnet",
+    "ip6-loopback",
+    "ip6-mcastprefix",
+    "local",
+    "localhost",
+    "localhost.localdomain",
+))
+_download_chunk_size = 64 * 1024
+_download_timeout = 30
+_tar_allowed_args = frozenset((
     "--xz",
     "-J",
     "--gzip",
     "-z",
     "--bzip2",
     "-j"
-}
+))
+_valid_settings = frozenset((
+    "target_ip",
+    "keep_domain_comments",
+    "skip_static_hosts",
+    "custom_static_hosts",
+    "backup_old_generated_hosts",
+    "backup_system_hosts",
+    "max_backups_to_keep",
+    "hosts_per_line"
+))
+_integer_settings = frozenset((
+    "max_backups_to_keep",
+    "hosts_per_line"
+))
+_bool_values = frozenset(("true", "false", "0", "1"))
+_bool_true_values = frozenset(("true", "1"))
 _header = """# Date: {date}
 # Number of unique domains: {number_of_rules}
 # ===============================================================
@@ -84,14 +148,7 @@ ff02::3 ip6-allhosts
 class OverridesValidator(object):
     """Validate a list of settings passed as arguments.
     """
-    _valid_settings = {
-        "target_ip",
-        "keep_domain_comments",
-        "skip_static_hosts",
-        "custom_static_hosts",
-        "backup_old_generated_hosts",
-        "backup_system_hosts"
-    }
+    _valid_settings = _valid_settings
 
     def __init__(self, raw_overrides):
         """
@@ -130,38 +187,37 @@ class OverridesValidator(object):
         """Validate the raw overrides.
         """
         for raw_override in self._raw_overrides:
-            override = raw_override.split("=")
+            key, separator, value = raw_override.partition("=")
 
-            if len(override) != 2:
+            if not separator or "=" in value:
                 self._errors.append("Wrong override format: '%s'" %
                                     raw_override + "\n" + "Correct format: 'key=value'")
                 continue
 
-            key, value = override
-
             if key not in self._valid_settings:
                 self._errors.append("Wrong key name: '%s'" % key)
                 continue
 
+            # Each value is only validated against the type of its key.
             if key == "target_ip":
+                if is_valid_ip(value):
+                    self._valid_overrides[key] = value
+                    continue
+
                 error_msg = _invalid_ip_msg
-            elif key == "max_backups_to_keep":
-                error_msg = _invalid_integer_msg
-            else:
-                error_msg = "Valid Boolean values are: true, 1, false or 0. (case insensitive)"
+            elif key in _integer_settings:
+                if is_valid_integer(value):
+                    self._valid_overrides[key] = int(value)
+                    continue
 
-            if key == "target_ip" and is_valid_ip(value):
-                self._valid_overrides[key] = value
-                continue
-            elif key == "max_backups_to_keep" and is_valid_integer(value):
-                self._valid_overrides[key] = int(value)
-                continue
+                error_msg = _invalid_integer_msg
             elif self._validate_bool(value):
                 self._valid_overrides[key] = self._get_bool(value)
                 continue
             else:
-                self._errors.append("Wrong value for: '%s'" % raw_override + "\n" + error_msg)
-                continue
+                error_msg = "Valid Boolean values are: true, 1, false or 0. (case insensitive)"
+
+            self._errors.append("Wrong value for: '%s'" % raw_override + "\n" + error_msg)
 
     def _validate_bool(self, value):
         """Validate Boolean.
@@ -176,7 +232,7 @@ class OverridesValidator(object):
         bool
             If it is a valid value for a Boolean.
         """
-        return value.lower() in {"true", "false", "0", "1"}
+        return value.lower() in _bool_values
 
     def _get_bool(self, value):
         """Get a Boolean.
@@ -191,7 +247,7 @@ class OverridesValidator(object):
         bool
             The Boolean.
         """
-        return value.lower() in {"true", "1"}
+        return value.lower() in _bool_true_values
 
 
 class HostsManager(object):
@@ -229,15 +285,20 @@ class HostsManager(object):
 
         self.logger = logger
         self._dry_run = dry_run
-        self._merge_blacklist_file = None
-        self._merge_whitelist_file = None
+        self._blacklist_lines = []
+        self._whitelist_lines = []
         self._final_file = None
+        self._http_session = None
+        self._static_hosts_header = None
+        self._stop_downloads = Event()
         self._current_date = time.strftime("%B %d %Y", time.gmtime())  # Format = January 1 2018
+        self._host_name = gethostname()
+        self._current_datetime = datetime.strptime(self._current_date, "%B %d %Y")
         self._profile_path = os.path.join(_profiles_path, profile)
 
         try:
-            with open(os.path.join(self._profile_path, "config.yaml"), "r") as config_file:
-                config = yaml_utils.load(config_file)
+            config = _load_yaml_cached(os.path.join(self._profile_path, "config.yaml"),
+                                       write_cache=not self._dry_run)
         except Exception as err:
             self.logger.error(err, term=False)
             raise exceptions.MissingConfigFileForProfile(err)
@@ -255,6 +316,7 @@ class HostsManager(object):
             "backup_old_generated_hosts": True,
             "backup_system_hosts": True,
             "max_backups_to_keep": 10,
+            "hosts_per_line": 8,
         }
 
         profile_settings = config.get("settings", {})
@@ -279,7 +341,8 @@ class HostsManager(object):
         sources_storage = os.path.join(self._profile_path, "sources_storage")
         self._sources_storage_raw = os.path.join(sources_storage, "raw")
         self._sources_storage_compressed = os.path.join(sources_storage, "compressed")
-        self._sources_last_updated = os.path.join(self._profile_path, "last-updated.yaml")
+        self._sources_last_updated = os.path.join(self._profile_path, "last-updated.json")
+        self._sources_last_updated_legacy = os.path.join(self._profile_path, "last-updated.yaml")
         self._backups_storage = os.path.join(self._profile_path, "backups_storage")
         self._profile_whitelist_path = os.path.join(self._profile_path, "whitelist")
         self._global_whitelist_path = os.path.join(_user_data_path, "global_whitelist")
@@ -348,8 +411,16 @@ class HostsManager(object):
         """Add additional data to the sources.
         """
         try:
-            with open(self._sources_last_updated, "r", encoding="UTF-8") as yaml_file:
-                self._last_update_data = yaml_utils.load(yaml_file)
+            with open(self._sources_last_updated, "r", encoding="UTF-8") as json_file:
+                self._last_update_data = json.load(json_file)
+        except FileNotFoundError:
+            # Read the data stored by older versions of this application. It will be stored
+            # in the new format the next time that the sources are updated.
+            try:
+                with open(self._sources_last_updated_legacy, "r", encoding="UTF-8") as yaml_file:
+                    self._last_update_data = yaml_utils.load(yaml_file) or {}
+            except Exception:
+                self._last_update_data = {}
         except Exception:
             self._last_update_data = {}
 
@@ -406,7 +477,7 @@ class HostsManager(object):
                     self.logger.log_dry_run("Surplus files will be removed inside the folder:\n%s"
                                             % self._backups_storage)
                 else:
-                    copy2("/etc/hosts", backup_file_path)
+                    _fast_copy("/etc/hosts", backup_file_path)
                     file_utils.remove_surplus_files(self._backups_storage, "system-hosts-*",
                                                     max_files_to_keep=self._settings["max_backups_to_keep"])
             except Exception as err:
@@ -419,7 +490,7 @@ class HostsManager(object):
         """
         self._log_shell_separator("#")
 
-        self._create_temporary_files()
+        self._collect_sources_data()
         self._remove_old_hosts_file()
         self._populate_exclusions_list()
         self._populate_final_file()
@@ -457,23 +528,91 @@ class HostsManager(object):
                 rmtree(self._sources_storage_raw)
                 rmtree(self._sources_storage_compressed)
 
-        try:
-            for source in self._sources:
-                self._log_shell_separator()
+        sources_to_update = []
 
-                if force_update or self._should_update_source(source):
+        for source in self._sources:
+            if force_update or self._should_update_source(source):
+                sources_to_update.append(source)
+            else:
+                self.logger.info("Source <%s> doesn't need updating." % source["name"])
+
+        try:
+            if self._dry_run:
+                for source in sources_to_update:
+                    self._log_shell_separator()
                     self.logger.info("Updating source <%s>" % source["name"])
+                    parent_dir = os.path.dirname(source["downloaded_filename"])
+
+                    if not file_utils.is_real_dir(parent_dir):
+                        self.logger.log_dry_run("Directory will be created at:\n%s" %
+                                                parent_dir)
+
+                    self.logger.log_dry_run("File will be downloaded:")
+                    self.logger.log_dry_run("URL: %s" % source["url"])
+                    self.logger.log_dry_run("Location: %s" % source["downloaded_filename"])
+
+                    if source.get("unzip_prog"):
+                        self._compressed_sources.append(source)
+            elif sources_to_update:
+                # Downloads are independent from each other and bound by network I/O, so they
+                # are performed concurrently. Their results are collected and logged from this
+                # thread, so there is no need to guard the shared data.
+                max_workers = min(_max_download_workers, len(sources_to_update))
+                # Progress bars of concurrent downloads would overwrite each other.
+                show_progress = max_workers == 1
+
+                # Reuse connections (and TLS sessions) for sources served from the same host.
+                if REQUESTS_INSTALLED:
+                    self._http_session = _get_http_session()
+
+                # NOTE: urllib (used for sources not downloaded through the session) has no
+                # timeout by default, so a stalled download would never check the stop event.
+                default_timeout = getdefaulttimeout()
+                setdefaulttimeout(_download_timeout)
+                self._stop_downloads.clear()
+                executor = ThreadPoolExecutor(max_workers=max_workers)
+                futures = {}
 
-                    try:
-                        self._download_source(source)
-                    except Exception as err:
-                        self.logger.error("Error in updating source. URL: ", source["url"])
-                        self.logger.error(err)
-                        continue
-                    except (KeyboardInterrupt, SystemExit):
-                        raise exceptions.KeyboardInterruption()
+                try:
+                    futures = {executor.submit(self._download_source, source, show_progress):
+                               source for source in sources_to_update}
+
+                    for future in as_completed(futures):
+                        source = futures[future]
+                        self._log_shell_separator()
+                        self.logger.info("Updating source <%s>" % source["name"])
+
+                        try:
+                            future.result()
+                        except Exception as err:
+                            self.logger.error(err)
+                            self.logger.error("Error in updating source. URL: %s" %
+                                              source["url"])
+                            continue
+
+                        self._last_update_data[source["slugified_name"]] = self._current_date
+
+                        if source.get("unzip_prog"):
+                            self._compressed_sources.append(source)
+                except (KeyboardInterrupt, SystemExit):
+                    # Do not wait for pending downloads. The ones already running are aborted
+                    # as soon as they receive their next chunk of data.
+                    # NOTE: The cancel_futures parameter of Executor.shutdown requires Python 3.9.
+                    self._stop_downloads.set()
+
+                    for future in futures:
+                        future.cancel()
+
+                    executor.shutdown(wait=False)
+                    raise
                 else:
-                    self.logger.info("Source <%s> doesn't need updating." % source["name"])
+                    executor.shutdown()
+                finally:
+                    setdefaulttimeout(default_timeout)
+
+                    if self._http_session is not None:
+                        self._http_session.close()
+                        self._http_session = None
         except (KeyboardInterrupt, SystemExit):
             raise exceptions.KeyboardInterruption()
         else:
@@ -481,8 +620,14 @@ class HostsManager(object):
                 self.logger.log_dry_run("Last update data for sources will be saved at:\n%s" %
                                         self._sources_last_updated)
             else:
-                with open(self._sources_last_updated, "w", encoding="UTF-8") as data_file:
-                    yaml_utils.dump(self._last_update_data, data_file)
+                with open(self._sources_last_updated, "w", encoding="UTF-8") as json_file:
+                    json.dump(self._last_update_data, json_file, indent=4, sort_keys=True)
+
+                # The data stored by older versions of this application is now obsolete.
+                try:
+                    os.remove(self._sources_last_updated_legacy)
+                except FileNotFoundError:
+                    pass
 
         if self._compressed_sources:
             self._handle_compressed_sources()
@@ -516,14 +661,14 @@ class HostsManager(object):
 
         try:
             then = datetime.strptime(last_updated, "%B %d %Y")
-            now = datetime.strptime(self._current_date, "%B %d %Y")
+            now = self._current_datetime
 
             if frequency == "w":  # Weekly.
-                return (now - then) > timedelta(days=6)
+                return (now - then) > _weekly_update_delta
             elif frequency == "m":  # Monthly.
-                return (now - then) > timedelta(days=29)
+                return (now - then) > _monthly_update_delta
             elif frequency == "s":  # Semestrial.
-                return (now - then) > timedelta(days=87)
+                return (now - then) > _semestrial_update_delta
         except Exception:
             return True
 
@@ -557,49 +702,29 @@ class HostsManager(object):
         else:
             self.logger.warning("There doesn't seem to be a generated hosts file.")
 
-    def _download_source(self, source):
+    def _download_source(self, source, show_progress):
         """Download the source files.
 
+        This method is executed from worker threads, so it must not modify the state of
+        this class nor log anything. Errors are propagated to the caller.
+
         Parameters
         ----------
         source : dict
             The source data.
-
-        Raises
-        ------
-        exceptions.KeyboardInterruption
-            See <class :any:`exceptions.KeyboardInterruption`>.
+        show_progress : bool
+            Display the download progress bar.
         """
-        is_compressed_source = source.get("unzip_prog")
-
-        parent_dir = os.path.dirname(source["downloaded_filename"])
-
-        if not file_utils.is_real_dir(parent_dir):
-            if self._dry_run:
-                self.logger.log_dry_run("Directory will be created at:\n%s" % parent_dir)
-            else:
-                try:
-                    os.makedirs(parent_dir, exist_ok=True)
-                except Exception as err:
-                    self.logger.error(err)
+        os.makedirs(os.path.dirname(source["downloaded_filename"]), exist_ok=True)
 
-        try:
-            if self._dry_run:
-                self.logger.log_dry_run("File will be downloaded:")
-                self.logger.log_dry_run("URL: %s" % source["url"])
-                self.logger.log_dry_run("Location: %s" % source["downloaded_filename"])
-            else:
-                tqdm_wget.download(source["url"], source["downloaded_filename"])
-        except (KeyboardInterrupt, SystemExit):
-            raise exceptions.KeyboardInterruption()
-        except Exception as err:
-            self.logger.error(err)
+        # NOTE: The session can only handle HTTP(S). Other schemes (e.g. file:// or ftp://)
+        # are handled by urllib.
+        if self._http_session is not None and urlparse(source["url"]).scheme in ("http", "https"):
+            _download_file(self._http_session, source["url"], source["downloaded_filename"],
+                           disable=not show_progress, stop_event=self._stop_downloads)
         else:
-            if not self._dry_run:
-                self._last_update_data[source["slugified_name"]] = self._current_date
-
-            if is_compressed_source:
-                self._compressed_sources.append(source)
+            tqdm_wget.download(source["url"], source["downloaded_filename"],
+                               disable=not show_progress, stop_event=self._stop_downloads)
 
     def _handle_compressed_sources(self):
         """Handle the downloaded sources with compressed files.
@@ -686,29 +811,70 @@ class HostsManager(object):
         except (KeyboardInterrupt, SystemExit):
             raise exceptions.KeyboardInterruption()
 
-    def _write_opening_header(self):
-        """Write the header information into the newly-created hosts file.
+    def _get_static_hosts_header(self):
+        """Get the static part of the hosts file header.
+
+        The static hosts only depend on the settings and the host name, so they are generated
+        only once, the first time they are needed.
+
+        Returns
+        -------
+        bytes
+            The encoded static hosts.
         """
-        self.logger.info("Writing the opening header...")
-        self._final_file.seek(0)  # Reset file pointer.
-        file_contents = self._final_file.readlines()  # Store content.
-        file_contents.sort()  # Sort content.
+        if self._static_hosts_header is None:
+            static_hosts = ""
 
-        self._final_file.seek(0)  # Write at the top.
+            if not self._settings["skip_static_hosts"]:
+                static_hosts += _header_static_hosts.format(host_name=self._host_name)
 
-        header = _header.format(
-            date=self._current_date,
-            number_of_rules="{:,}".format(self._number_of_rules)
-        )
+            if self._settings["custom_static_hosts"]:
+                static_hosts += self._settings["custom_static_hosts"].format(
+                    host_name=self._host_name)
 
-        if not self._settings["skip_static_hosts"]:
-            header += _header_static_hosts.format(host_name=gethostname())
+            self._static_hosts_header = static_hosts.encode("UTF-8")
 
-        if self._settings["custom_static_hosts"]:
-            header += self._settings["custom_static_hosts"].format(host_name=gethostname())
+        return self._static_hosts_header
 
-        self._final_file.write(bytes(header, "UTF-8"))
-        self._final_file.writelines(file_contents)
+    def _write_opening_header(self):
+        """Write the header information into the newly-created hosts file.
+        """
+        self.logger.info("Writing the opening header...")
+        self._final_file.flush()
+
+        with NamedTemporaryFile(prefix="sorted-hosts-file-",
+                                buffering=_io_buffer_size) as sorted_file:
+            sort_cmd = cmd_utils.which("sort")
+
+            if sort_cmd:
+                # Let the sort program handle the sorting. It is way faster than sorting in
+                # memory and it doesn't need to load the entire file at once.
+                # Sort by bytes values, not by the rules of the current locale.
+                # NOTE: Rules are already unique. Duplicates are discarded while populating
+                # the final file, in a single pass, using a set of host names.
+                cmd_utils.run_cmd([sort_cmd, "-o", sorted_file.name, self._final_file.name],
+                                  env=cmd_utils.get_environment(set_vars={"LC_ALL": "C"}),
+                                  check=True)
+            else:
+                _sort_file_lines(self._final_file, sorted_file)
+                sorted_file.flush()
+
+            sorted_file.seek(0)
+            self._final_file.seek(0)  # Write at the top.
+            self._final_file.truncate()
+
+            header = _header.format(
+                date=self._current_date,
+                number_of_rules="{:,}".format(self._number_of_rules)
+            ).encode("UTF-8")
+
+            self._final_file.write(header + self._get_static_hosts_header())
+            if self._settings["hosts_per_line"] > 1:
+                _write_packed_rules(sorted_file, self._final_file,
+                                    self._settings["target_ip"].encode("UTF-8"),
+                                    self._settings["hosts_per_line"])
+            else:
+                copyfileobj(sorted_file, self._final_file, _io_buffer_size)
 
         base_msg = "Newly generated hosts file at:\n%s"
 
@@ -746,7 +912,7 @@ class HostsManager(object):
                     time.strftime("%Y-%m-%d-%H-%M-%S")))
 
                 # Make a backup copy, marking the date in which the list was updated
-                copy2(self._hosts_file_path, backup_file_path)
+                _fast_copy(self._hosts_file_path, backup_file_path)
                 self.logger.info("Old generated hosts file backed up...")
                 file_utils.remove_surplus_files(self._backups_storage, "generated-hosts-*",
                                                 max_files_to_keep=self._settings["max_backups_to_keep"])
@@ -770,72 +936,106 @@ class HostsManager(object):
             os.makedirs(self._sources_storage_compressed, exist_ok=True)
             os.makedirs(self._backups_storage, exist_ok=True)
 
-    def _create_temporary_files(self):
-        """Create temporary files.
+    def _collect_sources_data(self):
+        """Collect the lines from all sources.
 
-        Initialize the files in which all source files will be merged for later pruning.
+        The lines from all whitelist sources and from all blacklist sources are stored in
+        memory for later pruning. Storing them in temporary files would require to encode them
+        to write them and to decode them again to read them back.
         """
-        self._merge_blacklist_file = NamedTemporaryFile()
-        self._merge_whitelist_file = NamedTemporaryFile()
+        self._blacklist_lines = []
+        self._whitelist_lines = []
 
-        self.logger.info("Creating initial temporary file...")
         self.logger.info("Collecting data from raw sources...")
 
-        for s in tqdm(range(len(self._sources))):
-            source = self._sources[s]
+        sources = self._sources
+
+        # For just a few sources, the progress bar costs more than it informs.
+        if len(sources) >= _progress_bar_min_items:
+            sources = tqdm(sources, miniters=max(1, len(sources) // 100), mininterval=0.25)
+
+        for source in sources:
             source_path = os.path.join(self._sources_storage_raw, source["slugified_name"])
 
-            if os.path.isfile(source_path):
-                source_data = None
+            try:
+                curFile = open(source_path, "rb", buffering=_read_chunk_size)
+            except FileNotFoundError:
+                continue
+
+            source_data = None
+            raw_data = bytearray()
+
+            # Read the file in chunks and normalize line endings (\r\n and \r) of each chunk as
+            # it is read, so the whole file is only decoded once and never copied as a string.
+            # A trailing \r is carried over to the next chunk in case it is followed by a \n.
+            with curFile:
+                pending_cr = b""
+
+                while True:
+                    chunk = curFile.read(_read_chunk_size)
 
-                # Deal only with UTF-8 and cp1252 encodings.
-                # If a source with any other encoding is found, FORGET OF ITS EXISTENCE!!!
+                    if not chunk:
+                        raw_data.extend(pending_cr and b"\n")
+                        break
+
+                    chunk = pending_cr + chunk
+
+                    if chunk.endswith(b"\r"):
+                        chunk = chunk[:-1]
+                        pending_cr = b"\r"
+                    else:
+                        pending_cr = b""
+
+                    raw_data.extend(chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n"))
+
+            # Deal only with UTF-8 and cp1252 encodings.
+            # If a source with any other encoding is found, FORGET OF ITS EXISTENCE!!!
+            try:
+                source_data = raw_data.decode("UTF-8")
+            except UnicodeDecodeError:
                 try:
-                    with open(source_path, "r", encoding="UTF-8") as curFile:
-                        source_data = curFile.read()
-                except UnicodeDecodeError:
-                    try:
-                        with open(source_path, "r", encoding="cp1252") as curFile:
-                            source_data = curFile.read()
-                    except UnicodeDecodeError as err:
-                        self.logger.warning("Attempt to open file with cp1252 encoding failed.")
-                        self.logger.warning("File ignored.")
-                        self.logger.error(err)
-                        continue
+                    source_data = raw_data.decode("cp1252")
+                except UnicodeDecodeError as err:
+                    self.logger.warning("Attempt to open file with cp1252 encoding failed.")
+                    self.logger.warning("File ignored.")
+                    self.logger.error(err)
+                    continue
 
-                if source_data:
-                    source_data = source_data.replace("\r", "")
-
-                    if source.get("pre_processors"):
-                        for pp in source.get("pre_processors"):
-                            try:
-                                if isinstance(pp, Callable):
-                                    pp_qual_name = pp.__qualname__
-                                    source_data = pp(source_data, self.logger)
-                                elif pp in builtin_pre_processors:
-                                    builtin_pre_pro = builtin_pre_processors.get(pp)
-                                    pp_qual_name = builtin_pre_pro.__qualname__
-                                    source_data = builtin_pre_pro(source_data, self.logger)
-                            except Exception as err:
-                                # Log the pre-processor function's qualified name.
-                                self.logger.error("Pre-processor error: %s" % pp_qual_name)
-                                self.logger.error(err)
-                                continue
-
-                    getattr(self,
-                            "_merge_whitelist_file"
-                            if source.get("is_whitelist") else
-                            "_merge_blacklist_file"
-                            ).write(bytes(source_data + "\n", "UTF-8"))
+            del raw_data
+
+            if source_data:
+                if source.get("pre_processors"):
+                    for pp in source.get("pre_processors"):
+                        try:
+                            if isinstance(pp, Callable):
+                                pp_qual_name = pp.__qualname__
+                                source_data = pp(source_data, self.logger)
+                            elif pp in builtin_pre_processors:
+                                builtin_pre_pro = builtin_pre_processors.get(pp)
+                                pp_qual_name = builtin_pre_pro.__qualname__
+                                source_data = builtin_pre_pro(source_data, self.logger)
+                        except Exception as err:
+                            # Log the pre-processor function's qualified name.
+                            self.logger.error("Pre-processor error: %s" % pp_qual_name)
+                            self.logger.error(err)
+                            continue
+
+                (self._whitelist_lines
+                 if source.get("is_whitelist") else
+                 self._blacklist_lines).extend(_get_rules_lines(source_data))
 
         self.logger.info("Collecting data from blacklist files...")
 
         for blacklist_file in [self._profile_blacklist_path, self._global_blacklist_path]:
-            if os.path.isfile(blacklist_file):
-                self.logger.info("Adding data from <%s>" %
-                                 os.path.relpath(blacklist_file, _user_data_path))
-                with open(blacklist_file, "r", encoding="UTF-8") as curFile:
-                    self._merge_blacklist_file.write(bytes(curFile.read(), "UTF-8"))
+            try:
+                curFile = open(blacklist_file, "r", encoding="UTF-8")
+            except FileNotFoundError:
+                continue
+
+            self.logger.info("Adding data from <%s>" %
+                             os.path.relpath(blacklist_file, _user_data_path))
+            with curFile:
+                self._blacklist_lines.extend(_get_rules_lines(curFile.read()))
 
     def _populate_exclusions_list(self):
         """Populate exclusions list.
@@ -850,35 +1050,34 @@ class HostsManager(object):
         self.logger.info("Processing local whitelist files...")
 
         for whitelist_file in [self._profile_whitelist_path, self._global_whitelist_path]:
-            if os.path.isfile(whitelist_file):
-                self.logger.info("Adding data from <%s>..." %
-                                 os.path.relpath(whitelist_file, _user_data_path))
-                with open(whitelist_file, "r", encoding="UTF-8") as ins:
-                    for line in ins:
-                        line = line.strip(" \t\n\r")
+            try:
+                ins = open(whitelist_file, "r", encoding="UTF-8")
+            except FileNotFoundError:
+                continue
+
+            self.logger.info("Adding data from <%s>..." %
+                             os.path.relpath(whitelist_file, _user_data_path))
+            with ins:
+                for line in ins:
+                    line = line.strip(" \t\n\r")
 
-                        if line and line[0] != "#":
-                            self._exclusions.add(line)
+                    if line and line[0] != "#":
+                        self._exclusions.add(line)
 
         self.logger.info("Processing whitelist sources...")
 
-        self._merge_whitelist_file.seek(0)  # reset file pointer
-        merge_whitelist_file_lines = self._merge_whitelist_file.readlines()
+        whitelist_lines = self._whitelist_lines
 
         try:
-            for l in tqdm(range(len(merge_whitelist_file_lines))):
-                line = merge_whitelist_file_lines[l].decode("UTF-8").strip()
+            for line in tqdm(whitelist_lines):
+                _, hostname, _ = self._normalize_rule(line, keep_comment=False)
 
-                if line and line[0] != "#" and line[:3] != "::1":
-                    target_ip, hostname, comment = self._normalize_rule(line)
-
-                    if hostname:
-                        self._exclusions.add(hostname)
+                if hostname:
+                    self._exclusions.add(hostname)
         except (KeyboardInterrupt, SystemExit):
-            self._merge_whitelist_file.close()
             raise exceptions.KeyboardInterruption()
-
-        self._merge_whitelist_file.close()
+        finally:
+            self._whitelist_lines = []
 
     def _populate_final_file(self):
         """Populate the final hosts file.
@@ -896,99 +1095,104 @@ class HostsManager(object):
         self.logger.info("Populating the new generated hosts file...")
 
         if self._dry_run:
-            self._final_file = NamedTemporaryFile(prefix="generated-hosts-file-", delete=False)
+            self._final_file = NamedTemporaryFile(prefix="generated-hosts-file-", delete=False,
+                                                  buffering=_io_buffer_size)
         else:
-            self._final_file = open(self._hosts_file_path, "w+b")
-
-        self._merge_blacklist_file.seek(0)  # reset file pointer
-
-        hostnames = {
-            "0.0.0.0"
-            "broadcasthost",
-            "ip6-allhosts",
-            "ip6-allnodes",
-            "ip6-allrouters",
-            "ip6-localhost",
-            "ip6-localnet",
-            "ip6-loopback",
-            "ip6-mcastprefix",
-            "local",
-            "localhost",
-            "localhost.localdomain",
-        }
+            self._final_file = open(self._hosts_file_path, "w+b", buffering=_io_buffer_size)
 
-        cache_size = 250000
-        cache_storage = ""
+        hostnames = set(_default_hosts)
+        # Excluded host names are handled exactly like already added host names. Merging both
+        # sets at once allows to test each host name with a single lookup.
+        hostnames |= self._exclusions
 
-        merge_blacklist_file_lines = self._merge_blacklist_file.readlines()
-        processed_lines = len(merge_blacklist_file_lines)
+        cache_storage = bytearray()
+        rule_prefix = self._settings["target_ip"].encode("UTF-8") + b" "
+        keep_domain_comments = self._settings["keep_domain_comments"]
 
         self.logger.info("Adding rules to the final hosts file...")
         try:
-            # DO NOT USE "continue" INSIDE THIS LOOP!!!
-            for l in tqdm(range(len(merge_blacklist_file_lines))):
-                line = merge_blacklist_file_lines[l].decode("UTF-8").strip()
-                processed_lines -= 1
-                normalized_rule = ""
-
-                # Do not use continue. This is to avoid exiting the loop
-                # while there is still data stored inside cache_storage.
-                if line and line[0] != "#" and line[:3] != "::1":
-                    # Normalize rule.
-                    target_ip, hostname, comment = self._normalize_rule(line)
-
-                    # Changing self._exclusions from a list to a set improved items
-                    # iterations from ~50.000 it/s to ~75.000 it/s.
-                    if hostname and hostname not in self._exclusions:
-                        if comment and self._settings["keep_domain_comments"]:
-                            normalized_rule = "%s %s #%s" % (target_ip, hostname, comment)
-                        else:
-                            normalized_rule = "%s %s" % (target_ip, hostname)
-
-                        if normalized_rule and (hostname not in hostnames):
-                            cache_size -= 1
-                            cache_storage += normalized_rule + "\n"
-                            hostnames.add(hostname)
-                            self._number_of_rules += 1
-
-                if (cache_size == 1 and cache_storage) or processed_lines == 1:
-                    self._final_file.write(bytes(cache_storage, "UTF-8"))
-                    cache_storage = ""
-                    cache_size = 250000
+            for line in tqdm(self._blacklist_lines):
+                # The same line is usually found in several sources. Lines that produced a valid
+                # rule are stored in the same set as the host names, so duplicated lines are
+                # skipped without being normalized again. A stored line can't be mistaken for
+                # a host name other than itself; any other line contains white spaces or a
+                # comment.
+                if line in hostnames:
+                    continue
+
+                # Normalize rule.
+                _, hostname, comment = self._normalize_rule(
+                    line, keep_comment=keep_domain_comments)
+
+                if not hostname:
+                    continue
+
+                if hostname not in hostnames:
+                    # Build the rules directly as bytes. Appending to a bytearray doesn't
+                    # copy the already stored data like concatenating strings does.
+                    # Appending each part separately avoids formatting a new bytes object
+                    # for each rule.
+                    cache_storage += rule_prefix
+                    cache_storage += hostname.encode("UTF-8")
+
+                    if comment:
+                        cache_storage += b" #"
+                        cache_storage += comment.encode("UTF-8")
+
+                    cache_storage += b"\n"
+
+                    hostnames.add(hostname)
+                    self._number_of_rules += 1
+
+                    if len(cache_storage) >= _io_buffer_size:
+                        self._final_file.write(cache_storage)
+                        cache_storage.clear()
+
+                hostnames.add(line)
+
+            # Write whatever is left once all lines were processed.
+            if cache_storage:
+                self._final_file.write(cache_storage)
         except (KeyboardInterrupt, SystemExit):
-            self._merge_blacklist_file.close()
             raise exceptions.KeyboardInterruption()
+        finally:
+            self._blacklist_lines = []
 
-        self._merge_blacklist_file.close()
-
-    def _normalize_rule(self, line):
+    def _normalize_rule(self, line, keep_comment=True):
         """Standardize and format the rule string provided.
 
         Parameters
         ----------
         line : str
             The line to be standardized.
+        keep_comment : bool, optional
+            Whether to extract the comment from the line. If False, the returned comment is
+            always an empty string.
 
         Returns
         -------
         tuple
             The rules elements.
         """
-        try:
-            stripped_rule, comment = [part.strip() for part in line.split("#", 1)]
-        except Exception:
-            stripped_rule, comment = line.strip(), ""
+        # NOTE: str.partition never raises, unlike unpacking the result of str.split.
+        # Exception handling is expensive and this method is called for every single line.
+        if keep_comment:
+            stripped_rule, _, comment = line.partition("#")
+            comment = comment.strip()
+        else:
+            # Most lines don't have a comment. Don't build strings that would be discarded.
+            stripped_rule = line.partition("#")[0] if "#" in line else line
+            comment = ""
 
         rule_parts = stripped_rule.split()
 
-        try:
-            try:
-                # In "ip host" format. Most likely a line from a file in hosts format.
-                hostname = rule_parts[1].lower()
-            except Exception:
-                # In "host" format. Most likely a line for a file with a list of domains.
-                hostname = rule_parts[0].lower()
-        except Exception:
+        if len(rule_parts) > 1:
+            # In "ip host" format. Most likely a line from a file in hosts format.
+            hostname = rule_parts[1].lower()
+        elif rule_parts:
+            # In "host" format. Most likely a line for a file with a list of domains.
+            hostname = rule_parts[0].lower()
+        else:
             hostname = None
 
         if hostname and is_valid_host(hostname):
@@ -1000,13 +1204,303 @@ class HostsManager(object):
         return _invalid_rule
 
 
-def is_valid_host(host):
+def _get_rules_lines(data):
+    """Get the lines from a source that could contain a rule.
+
+    Lines are stripped, and empty lines, comment lines and IPv6 localhost rules are discarded
+    at once, so the loops that process the rules don't have to.
+
+    Parameters
+    ----------
+    data : str
+        The content of a source.
+
+    Returns
+    -------
+    list
+        The lines that could contain a rule.
+    """
+    return [line for line in map(str.strip, data.split("\n"))
+            if line and not line.startswith(_ignored_lines_prefixes)]
+
+
+def _get_http_session():
+    """Get an HTTP session to download sources.
+
+    The session keeps a pool of connections per host, so sources served from the same host
+    reuse already established connections. Failed requests are retried.
+
+    Returns
+    -------
+    requests.Session
+        The HTTP session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                          max_retries=Retry(total=3, backoff_factor=0.3))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # NOTE: Same as tqdm_wget.download, do not verify certificates. Otherwise, sources served
+    # from misconfigured servers would fail to download.
+    session.verify = False
+    disable_warnings(category=InsecureRequestWarning)
+
+    return session
+
+
+def _download_file(session, url, file_path, disable=False, stop_event=None):
+    """Download a file displaying a progress bar.
+
+    Parameters
+    ----------
+    session : requests.Session
+        The HTTP session to use.
+    url : str
+        The URL to the file to download.
+    file_path : str
+        Downloaded file destination.
+    disable : bool, optional
+        Do not display the progress bar.
+    stop_event : threading.Event, optional
+        If set while downloading, the download is aborted.
+
+    Raises
+    ------
+    InterruptedError
+        If the download was aborted.
+    """
+    with session.get(url, stream=True, timeout=_download_timeout) as response:
+        response.raise_for_status()
+        total_size = int(response.headers.get("Content-Length", 0)) or None
+
+        with open(file_path, "wb") as downloaded_file, \
+                tqdm(total=total_size, unit="B", unit_scale=True, unit_divisor=1024,
+                     miniters=1, disable=disable) as progress_bar:
+            for chunk in response.iter_content(_download_chunk_size):
+                if stop_event is not None and stop_event.is_set():
+                    raise InterruptedError("Download aborted: %s" % url)
+
+                downloaded_file.write(chunk)
+                progress_bar.update(len(chunk))
+
+
+def _write_packed_rules(src_file, dst_file, target_ip, hosts_per_line):
+    """Write rules with several host names per line.
+
+    Resolvers read hosts files line by line, so fewer lines make for a smaller file that is
+    faster to look up. Rules with a comment are written as they are.
+
+    Parameters
+    ----------
+    src_file : object
+        File object opened in binary mode containing one rule per line.
+    dst_file : object
+        File object opened in binary mode in which to write the packed rules.
+    target_ip : bytes
+        The IP address used by all rules.
+    hosts_per_line : int
+        Maximum amount of host names per line.
+    """
+    prefix = target_ip + b" "
+    prefix_length = len(prefix)
+    host_names = []
+
+    for rule in src_file:
+        if b"#" in rule:
+            dst_file.write(rule)
+            continue
+
+        host_names.append(rule[prefix_length:].rstrip(b"\n"))
+
+        if len(host_names) == hosts_per_line:
+            dst_file.write(prefix + b" ".join(host_names) + b"\n")
+            host_names.clear()
+
+    if host_names:
+        dst_file.write(prefix + b" ".join(host_names) + b"\n")
+
+
+def _fast_copy(src, dst):
+    """Copy a file using ``os.sendfile``.
+
+    The data is copied inside the kernel in chunks of 1 MiB. Only the permission bits and the
+    access/modification times of ``src`` are copied into ``dst``.
+
+    Parameters
+    ----------
+    src : str
+        Path to the file to copy.
+    dst : str
+        Path to the destination file.
+    """
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        src_fd = src_file.fileno()
+        dst_fd = dst_file.fileno()
+        src_stat = os.fstat(src_fd)
+        offset = 0
+
+        try:
+            while True:
+                sent = os.sendfile(dst_fd, src_fd, offset, _io_buffer_size)
+
+                if not sent:
+                    break
+
+                offset += sent
+        except OSError:
+            # Some file systems do not support sendfile. Fall back to a regular copy.
+            if offset:
+                raise
+
+            copyfileobj(src_file, dst_file, _io_buffer_size)
+
+    os.chmod(dst, src_stat.st_mode & 0o7777)
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+
+def _sort_file_lines(src_file, dst_file, max_lines_per_run=_sort_run_size):
+    """Sort the lines of a file without loading the entire file into memory.
+
+    The lines of ``src_file`` are split into runs of at most ``max_lines_per_run`` lines. Each run
+    is sorted and stored into a temporary file, then all runs are merged into ``dst_file``.
+
+    Parameters
+    ----------
+    src_file : object
+        File object opened in binary mode containing the lines to sort.
+    dst_file : object
+        File object opened in binary mode in which to write the sorted lines.
+    max_lines_per_run : int, optional
+        Maximum amount of lines to sort in memory at once.
+    """
+    runs = []
+
+    try:
+        src_file.seek(0)
+
+        while True:
+            lines = list(islice(src_file, max_lines_per_run))
+
+            if not lines:
+                break
+
+            lines.sort()
+            run_file = TemporaryFile(buffering=_io_buffer_size)
+            run_file.writelines(lines)
+            run_file.seek(0)
+            runs.append(run_file)
+
+        del lines
+        dst_file.writelines(heapq.merge(*runs))
+    finally:
+        for run_file in runs:
+            run_file.close()
+
+
+def _get_yaml_cache_path(file_path):
+    """Get the path to the JSON cache of a YAML file.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a YAML file.
+
+    Returns
+    -------
+    str
+        Path to the cache file.
+    """
+    return file_path + ".cache.json"
+
+
+def _write_yaml_cache(file_path, data):
+    """Store the data parsed from a YAML file into its cache file.
+
+    The cache file is replaced atomically. Data that doesn't survive a round trip through JSON
+    unchanged isn't cached. Failing to write the cache isn't fatal, the YAML file will simply be
+    parsed again the next time it is loaded.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a YAML file.
+    data : object
+        The data parsed from ``file_path``.
+    """
+    cache_path = _get_yaml_cache_path(file_path)
+    temp_path = "%s.%d.tmp" % (cache_path, os.getpid())
+
+    try:
+        stat = os.stat(file_path)
+        cache_data = json.dumps({
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "data": data
+        })
+
+        # NOTE: JSON converts tuples into lists and non string keys into strings, for example.
+        if json.loads(cache_data)["data"] != data:
+            return
+
+        with open(temp_path, "w", encoding="UTF-8") as cache_file:
+            cache_file.write(cache_data)
+
+        os.replace(temp_path, cache_path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def _load_yaml_cached(file_path, write_cache=True):
+    """Load a YAML file using a JSON cache stored next to it.
+
+    The cache is only used if the modification time and size of the YAML file match the ones
+    stored in the cache. Otherwise, the YAML file is parsed and the cache is re-generated.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a YAML file.
+    write_cache : bool, optional
+        Whether to re-generate the cache if it isn't up to date.
+
+    Returns
+    -------
+    object
+        The data parsed from the YAML file.
+    """
+    stat = os.stat(file_path)
+
+    try:
+        with open(_get_yaml_cache_path(file_path), "r", encoding="UTF-8") as cache_file:
+            cache = json.load(cache_file)
+
+        if cache["mtime_ns"] == stat.st_mtime_ns and cache["size"] == stat.st_size:
+            return cache["data"]
+    except Exception:
+        pass
+
+    with open(file_path, "r", encoding="UTF-8") as yaml_file:
+        data = yaml_utils.load(yaml_file)
+
+    if write_cache:
+        _write_yaml_cache(file_path, data)
+
+    return data
+
+
+def is_valid_host(host, _match=_hostname_regex.fullmatch):
     """IDN compatible domain validation.
 
     Parameters
     ----------
     host : str
         The host name to check.
+    _match : method, optional
+        The ``fullmatch`` method of the compiled regular expression used to validate the host
+        name. Bound as a default argument for faster lookup. Not meant to be passed.
 
     Returns
     -------
@@ -1020,8 +1514,9 @@ def is_valid_host(host):
     """
     host = host.rstrip(".")
 
-    return all([len(host) > 1,
-                len(host) < 253] + [_hostname_regex.match(x) for x in host.split(".")])
+    # NOTE: Matching the whole host name at once keeps the loop over its labels inside the
+    # regular expression engine instead of splitting the host name and matching each label.
+    return 1 < len(host) < 253 and _match(host) is not None
 
 
 def is_valid_ip(address):
@@ -13,21 +13,17 @@ root_folder : str
 import os
 import sys
 
-from threading import Thread
-
-from . import app_utils
 from .__init__ import __appdescription__
 from .__init__ import __appname__
 from .__init__ import __status__
 from .__init__ import __version__
-from .python_utils import bottle_utils
 from .python_utils import cli_utils
 from .python_utils import exceptions
 from .python_utils import shell_utils
 
 
-root_folder = os.path.realpath(os.path.abspath(os.path.join(
-    os.path.normpath(os.getcwd()))))
+# NOTE: os.getcwd always returns an absolute path and os.path.realpath normalizes it.
+root_folder = os.path.realpath(os.getcwd())
 
 
 docopt_doc = """{appname} {version} ({status})
@@ -36,13 +32,12 @@ docopt_doc = """{appname} {version} ({status})
 
 Usage:
     app.py (-h | --help | --manual | --version)
-    app.py (-f | --flush-dns-cache) [-d | --dry-run]
-    app.py run (update | build | install) [update] [build] [install]
-               (-p <name> | --profile=<name>)
-               [-o <key=value>... | --override=<key=value>...]
-               [-f | --flush-dns-cache]
-               [-u | --force-update]
-               [-d | --dry-run]
+    app.py --flush-dns-cache [--dry-run]
+    app.py run (update | build | install)... --profile=<name>
+               [--override=<key=value>...]
+               [--flush-dns-cache]
+               [--force-update]
+               [--dry-run]
     app.py server (start | stop | restart)
                   [--host=<host>]
                   [--port=<port>]
@@ -90,6 +85,15 @@ Options:
            version=__version__,
            status=__status__)
 
+_web_app_path = os.path.join(root_folder, "AppData", "HostsManagerApp", "HostsManager_webapp.py")
+
+# The name of the function that runs each task of the run command, in execution order.
+_run_tasks = {
+    "update": "update_all_sources",
+    "build": "build_hosts_file",
+    "install": "install_hosts_file"
+}
+
 
 class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
     """Command line interface.
@@ -132,23 +136,19 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
             if self.a["new_profile"]:
                 self.func_names.append("new_profile_generation")
         elif self.a["server"]:
-            self.logger.info("**Command:** server")
-            self.logger.info("**Arguments:**")
-
-            if self.a["start"]:
-                self.logger.info("start")
-                self.func_names.append("http_server_start")
-            elif self.a["stop"]:
-                self.logger.info("stop")
-                self.func_names.append("http_server_stop")
-            elif self.a["restart"]:
-                self.logger.info("restart")
-                self.func_names.append("http_server_restart")
+            action = "start" if self.a["start"] else "stop" if self.a["stop"] else "restart"
+
+            # Log the command and its arguments as a single record.
+            self.logger.info("**Command:** server\n**Arguments:**\n%s" % action)
+            self.func_names.append("http_server_%s" % action)
         elif self.a["run"]:
-            # Workaround docopt issue:
-            # https://github.com/docopt/docopt/issues/134
-            # Not perfect, but good enough for this particular usage case.
-            args_overrides = list(set(self.a["--override"]))
+            # Remove repeated overrides while keeping the order in which they were passed, so
+            # errors are always reported in the same order.
+            args_overrides = list(dict.fromkeys(self.a["--override"]))
+
+            # NOTE: Imported only when needed. app_utils pulls in most of the application's
+            # dependencies, which other commands don't use.
+            from . import app_utils
 
             overrides_validator = app_utils.OverridesValidator(args_overrides)
             override_errors = overrides_validator.get_errors()
@@ -167,20 +167,11 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
                                                         dry_run=self.a["--dry-run"],
                                                         settings_overrides=overrides_validator.get_valid_overrides(),
                                                         logger=self.logger)
-            self.logger.info("**Command:** run")
-            self.logger.info("**Arguments:**")
+            tasks = [task for task in _run_tasks if self.a[task]]
 
-            if self.a["update"]:
-                self.logger.info("update")
-                self.func_names.append("update_all_sources")
-
-            if self.a["build"]:
-                self.logger.info("build")
-                self.func_names.append("build_hosts_file")
-
-            if self.a["install"]:
-                self.logger.info("install")
-                self.func_names.append("install_hosts_file")
+            # Log the command and its arguments as a single record.
+            self.logger.info("**Command:** run\n**Arguments:**\n%s" % "\n".join(tasks))
+            self.func_names.extend(_run_tasks[task] for task in tasks)
 
         if self.a["--flush-dns-cache"]:
             self.func_names.append("flush_dns_cache")
@@ -194,18 +185,10 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
             See <class :any:`exceptions.KeyboardInterruption`>.
         """
         try:
-            threads = []
-
-            if self.func_names:
-                for func in self.func_names:
-                    t = Thread(target=getattr(self, func, None))
-                    t.daemon = True
-                    t.start()
-                    threads.append(t)
-
-                    for thread in threads:
-                        if thread is not None and thread.isAlive():
-                            thread.join()
+            # NOTE: Tasks depend on each other (install needs build, build needs update), so they
+            # are executed sequentially in the order they were added.
+            for func in self.func_names:
+                getattr(self, func)()
         except (KeyboardInterrupt, SystemExit):
             raise exceptions.KeyboardInterruption()
 
@@ -227,6 +210,8 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
     def flush_dns_cache(self):
         """See :any:`app_utils.flush_dns_cache`
         """
+        from . import app_utils
+
         app_utils.flush_dns_cache(dry_run=self.a["--dry-run"],
                                   logger=self.logger)
 
@@ -246,6 +231,8 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
     def new_profile_generation(self):
         """See :any:`app_utils.new_profile_generation`
         """
+        from . import app_utils
+
         app_utils.new_profile_generation(logger=self.logger)
 
     def http_server(self, action="start"):
@@ -256,15 +243,12 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
         action : str, optional
             Any of the following: start/stop/restart.
         """
-        app_slug = "HostsManager"
-        web_app_path = os.path.abspath(os.path.join(root_folder, "AppData",
-                                                    "%sApp" % app_slug,
-                                                    "%s_webapp.py" % app_slug))
+        from .python_utils import bottle_utils
 
         bottle_utils.handle_server(action=action,
                                    server_args={
                                        "www_root": self.www_root,
-                                       "web_app_path": web_app_path,
+                                       "web_app_path": _web_app_path,
                                        "host": self.a["--host"],
                                        "port": self.a["--port"]
                                    },
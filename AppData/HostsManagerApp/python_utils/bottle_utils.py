@@ -91,12 +91,16 @@ def stop_server(restart=False, server_args={}, logger=None):
     # If the server is launched with different hosts/ports, one could end up
     # serving the same location through different hosts/ports. This is just a conjecture;
     # I didn't really test it, but it seems obvious at a glance.
-    for proc in psutil.process_iter():
+    web_app_path = server_args.get("web_app_path")
+
+    # NOTE: Passing the attributes to process_iter retrieves them while iterating the processes.
+    # Processes whose command line can't be accessed get None instead of raising an exception.
+    for proc in psutil.process_iter(["cmdline"]):
         try:
-            # NOTE: Using proc.cmdline() to check the entire path because putil.name() NEVER
+            # NOTE: Using the command line to check the entire path because putil.name() NEVER
             # F*CKING gives a complete process name!!! FFS!!! I implemented the use of a f*cking
             # third-party module to simplify things, and I always end up eating the same sh*t!!!
-            if server_args.get("web_app_path") in proc.cmdline():
+            if web_app_path in (proc.info["cmdline"] or ()):
                 proc.terminate()
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             pass
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 """Common utilities to perform file operations.
 """
+import fnmatch
+import heapq
 import os
 
 from glob import glob
@@ -162,12 +164,22 @@ def remove_surplus_files(folder, file_pattern, max_files_to_keep=20):
     max_files_to_keep : int, optional
         Maximum amount of files to keep inside the folder.
     """
-    all_files = sorted(recursive_glob(folder, file_pattern))
-
-    if len(all_files) > max_files_to_keep:
-        files_to_delete = all_files[:len(all_files) - max_files_to_keep]
-
-        for f in files_to_delete:
+    all_files = []
+    match_hidden = file_pattern.startswith(".")
+
+    # NOTE: Same files as the ones matched by recursive_glob, but only files are collected and
+    # the directory entries are obtained with a single os.scandir call per folder.
+    for root, dirs, files in os.walk(folder, followlinks=True):
+        # Same as glob, ignore hidden folders and hidden files.
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        all_files.extend(os.path.join(root, f) for f in fnmatch.filter(files, file_pattern)
+                         if match_hidden or not f.startswith("."))
+
+    surplus_files = len(all_files) - max_files_to_keep
+
+    if surplus_files > 0:
+        # Only the files to delete need to be ordered.
+        for f in heapq.nsmallest(surplus_files, all_files):
             os.remove(f)
 
 
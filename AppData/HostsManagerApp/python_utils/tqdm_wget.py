@@ -39,7 +39,7 @@ class TqdmUpTo(tqdm):
         self.update(b * bsize - self.n)  # will also set self.n = b * bsize
 
 
-def download(url, filename):
+def download(url, filename, disable=False, stop_event=None):
     """Download file.
 
     Parameters
@@ -48,11 +48,26 @@ def download(url, filename):
         The URL to the file to download.
     filename : str
         Downloaded file destination.
+    disable : bool, optional
+        Do not display the progress bar.
+    stop_event : threading.Event, optional
+        If set while downloading, the download is aborted.
+
+    Raises
+    ------
+    InterruptedError
+        If the download was aborted.
     """
-    with TqdmUpTo(unit="B", unit_scale=True, unit_divisor=1024, miniters=1) as t:
-        urlretrieve(url, filename=filename, reporthook=t.update_to, data=None)
-        t.total = t.n
+    with TqdmUpTo(unit="B", unit_scale=True, unit_divisor=1024, miniters=1,
+                  disable=disable) as t:
+        def reporthook(b=1, bsize=1, tsize=None):
+            if stop_event is not None and stop_event.is_set():
+                raise InterruptedError("Download aborted: %s" % url)
 
+            t.update_to(b, bsize, tsize)
+
+        urlretrieve(url, filename=filename, reporthook=reporthook, data=None)
+        t.total = t.n
 
 if __name__ == "__main__":
     pass
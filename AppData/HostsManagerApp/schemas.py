@@ -19,7 +19,8 @@ settings_schema = {
         "custom_static_hosts",
         "backup_old_generated_hosts",
         "backup_system_hosts",
-        "max_backups_to_keep"
+        "max_backups_to_keep",
+        "hosts_per_line"
     ],
     "properties": {
         "target_ip": {
@@ -59,6 +60,12 @@ settings_schema = {
             "type": "integer",
             "default": 10,
             "description": "How many backed up hosts files (system's and generated) to keep. Older backup files will be automatically deleted.",
+        },
+        "hosts_per_line": {
+            "type": "integer",
+            "minimum": 1,
+            "default": 8,
+            "description": "Maximum amount of host names per line in the generated hosts file. Rules with comments are always written one per line.",
         }
     }
 }
@@ -72,10 +79,10 @@ sources_schema = {
     "items": {
         "type": "object",
         "additionalProperties": True,
-        "required": {
+        "required": [
             "name",
             "url"
-        },
+        ],
         "dependencies": {
             "unzip_prog": ["unzip_target"],
         },
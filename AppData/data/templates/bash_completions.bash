@@ -31,7 +31,8 @@ __hosts_manager_cli_{current_date}(){
 "custom_static_hosts="
 "backup_old_generated_hosts=true"
 "backup_system_hosts=true"
-"max_backups_to_keep=10")
+"max_backups_to_keep=10"
+"hosts_per_line=8")
 
     case $prev in
         --profile)